@@ -1,37 +1,110 @@
-from fastapi import FastAPI, APIRouter, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi import FastAPI, APIRouter, HTTPException, Query, Request, Response, WebSocket
+from fastapi.responses import ORJSONResponse
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
+from starlette.middleware.gzip import GZipMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import DeleteMany, InsertOne
 import os
 import logging
 from pathlib import Path
-from pydantic import BaseModel, Field, ConfigDict
-from typing import List, Optional, Dict, Any
+from types import MappingProxyType
+from pydantic import BaseModel, Field, ConfigDict, TypeAdapter, computed_field
+from typing import List, Optional, Dict, Any, Set, Tuple, Callable, Awaitable
 import uuid
 from datetime import datetime, timezone
 import asyncio
-import random
+import hashlib
+import time
 import math
+import numpy as np
+import orjson
+from collections import OrderedDict, defaultdict
+from functools import lru_cache
+from urllib.parse import unquote
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
 # MongoDB connection
 mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
+# Keep a few connections open so the first requests don't pay for the handshake;
+# bounded waits so a saturated pool or unreachable server fails requests instead of stalling them
+client = AsyncIOMotorClient(
+    mongo_url,
+    minPoolSize=8,
+    maxPoolSize=32,
+    waitQueueTimeoutMS=2000,
+    connectTimeoutMS=2000,
+    serverSelectionTimeoutMS=5000,
+)
 db = client[os.environ['DB_NAME']]
 
 # Create the main app
-app = FastAPI(title="EW HALIMUNAN ATM - Himpunan Analisis Lindungan Intelijen Medan Udara Negara")
+app = FastAPI(
+    title="EW HALIMUNAN ATM - Himpunan Analisis Lindungan Intelijen Medan Udara Negara",
+    default_response_class=ORJSONResponse
+)
+
+# Whether the emitters collection holds documents. Every read endpoint serves
+# sample data exactly while it is False, so writes that can empty the
+# collection re-check it via sync_emitters_seeded()
+app.state.db_seeded_emitters = True
 
 # Create a router with the /api prefix
 api_router = APIRouter(prefix="/api")
 
+# Response timestamps are cached for 100 ms - hot paths (WebSocket ticks, polled
+# endpoints) read the cached ISO string instead of formatting a new one per call
+_NOW_ISO_TTL_S = 0.1
+_now_iso = ""
+_now_iso_expires = 0.0
+
+def utc_now_iso() -> str:
+    global _now_iso, _now_iso_expires
+    now = time.monotonic()
+    if now >= _now_iso_expires:
+        _now_iso = datetime.now(timezone.utc).isoformat()
+        _now_iso_expires = now + _NOW_ISO_TTL_S
+    return _now_iso
+
+# Random bytes for uuid7(), read from the OS in blocks rather than one syscall per ID
+_UUID_RAND_BLOCK = 10 * 1024
+_uuid_rand = b""
+_uuid_rand_pos = 0
+
+def _reset_uuid_rand():
+    # A forked worker must not mint IDs from its parent's leftover random bytes
+    global _uuid_rand, _uuid_rand_pos
+    _uuid_rand, _uuid_rand_pos = b"", 0
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_uuid_rand)
+
+def uuid7() -> str:
+    """Time-ordered UUIDv7 string - keeps inserts on the unique `id` index near the right-hand edge"""
+    global _uuid_rand, _uuid_rand_pos
+    if _uuid_rand_pos >= len(_uuid_rand):
+        _uuid_rand, _uuid_rand_pos = os.urandom(_UUID_RAND_BLOCK), 0
+    rand = int.from_bytes(_uuid_rand[_uuid_rand_pos:_uuid_rand_pos + 10], "big")
+    _uuid_rand_pos += 10
+    
+    unix_ms = time.time_ns() // 1_000_000
+    value = (
+        (unix_ms & 0xFFFFFFFFFFFF) << 80
+        | 0x7 << 76  # version
+        | (rand >> 68) << 64  # 12 random bits
+        | 0b10 << 62  # RFC 9562 variant
+        | rand & 0x3FFFFFFFFFFFFFFF  # 62 random bits
+    )
+    h = f"{value:032x}"
+    return f"{h[:8]}-{h[8:12]}-{h[12:16]}-{h[16:20]}-{h[20:]}"
+
 # ============ MODELS ============
 
 class Emitter(BaseModel):
-    model_config = ConfigDict(extra="ignore")
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    model_config = ConfigDict(extra="ignore", frozen=True)
+    id: str = Field(default_factory=uuid7)
     name: str
     emitter_type: str  # radar, communication, jammer, iff
     platform: str  # aircraft, ship, ground, satellite
@@ -48,8 +121,17 @@ class Emitter(BaseModel):
     confidence: float = 0.85
     is_active: bool = True
     affiliation: str = "hostile"  # hostile, friendly, neutral, unknown
-    last_detected: str = Field(default_factory=lambda: datetime.now(timezone.utc).isoformat())
-    created_at: str = Field(default_factory=lambda: datetime.now(timezone.utc).isoformat())
+    source: Optional[str] = None  # simulation (scenario-loaded) or None (operator-created)
+    last_detected: str = Field(default_factory=utc_now_iso)
+    created_at: str = Field(default_factory=utc_now_iso)
+    
+    @computed_field
+    @property
+    def location(self) -> Dict[str, Any]:
+        """GeoJSON point persisted alongside lat/lon for the 2dsphere index"""
+        return {"type": "Point", "coordinates": [self.longitude, self.latitude]}
+
+EMITTER_LIST_ADAPTER = TypeAdapter(List[Emitter])
 
 class EmitterCreate(BaseModel):
     name: str
@@ -62,15 +144,16 @@ class EmitterCreate(BaseModel):
     prf: Optional[float] = None
     pulse_width: Optional[float] = None
     modulation_type: Optional[str] = None
-    latitude: float
-    longitude: float
+    # The 2dsphere index on location rejects anything outside these ranges
+    latitude: float = Field(..., ge=-90, le=90)
+    longitude: float = Field(..., ge=-180, le=180)
     altitude: Optional[float] = 0
     confidence: float = 0.85
     affiliation: str = "hostile"
 
 class Countermeasure(BaseModel):
-    model_config = ConfigDict(extra="ignore")
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    model_config = ConfigDict(extra="ignore", frozen=True)
+    id: str = Field(default_factory=uuid7)
     name: str
     technique_type: str  # jamming, deception, chaff, flare, cyber
     description: str
@@ -80,17 +163,17 @@ class Countermeasure(BaseModel):
     side_effects: Optional[str] = None
 
 class ThreatAssessment(BaseModel):
-    model_config = ConfigDict(extra="ignore")
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    model_config = ConfigDict(extra="ignore", frozen=True)
+    id: str = Field(default_factory=uuid7)
     emitter_id: str
     threat_score: float
     kill_chain_phase: str  # detection, tracking, engagement, intercept
     time_to_impact: Optional[float] = None
     recommended_actions: List[str]
-    assessed_at: str = Field(default_factory=lambda: datetime.now(timezone.utc).isoformat())
+    assessed_at: str = Field(default_factory=utc_now_iso)
 
 class Scenario(BaseModel):
-    model_config = ConfigDict(extra="ignore")
+    model_config = ConfigDict(extra="ignore", frozen=True)
     id: str
     name: str
     description: str
@@ -103,14 +186,22 @@ class Scenario(BaseModel):
 
 class ChatMessage(BaseModel):
     message: str
-    session_id: Optional[str] = "default"
+    session_id: Optional[str] = None  # as returned by a previous /ai/chat response
 
 class ChatResponse(BaseModel):
     response: str
     context: Optional[Dict[str, Any]] = None
+    session_id: Optional[str] = None
+
+class AnalyzeBatchRequest(BaseModel):
+    emitter_ids: List[str] = Field(..., min_length=1, max_length=20)
 
 # ============ SAMPLE DATA - EW HALIMUNAN ATM - MALAYSIAN ARMED FORCES ============
 
+def _freeze(entries: List[Dict]) -> Tuple[MappingProxyType, ...]:
+    """Read-only reference data: shared across requests, so entries must not be mutated in place"""
+    return tuple(MappingProxyType(e) for e in entries)
+
 # Malacca Strait Commercial Radar Database
 MALACCA_RADAR_DB = {
     "commercial_radars": ["S-band X-band", "Furuno FAR-21xx", "JRC JMA-53xx"],
@@ -136,7 +227,7 @@ TACTICAL_EW_KIT = {
     ]
 }
 
-SAMPLE_EMITTERS = [
+SAMPLE_EMITTERS = _freeze([
     # ===== DEMO 1: SELAT MELAKA GUARDIAN - QUICK WIN SCENARIO =====
     # Friendly Forces
     {
@@ -708,9 +799,9 @@ SAMPLE_EMITTERS = [
         "scenario": "nusantara",
         "pass_time_minutes": 15
     }
-]
+])
 
-SAMPLE_COUNTERMEASURES = [
+SAMPLE_COUNTERMEASURES = _freeze([
     # Demo 1: Selat Melaka Guardian Countermeasures
     {
         "name": "Lumut EW Station Triangulation",
@@ -885,9 +976,9 @@ SAMPLE_COUNTERMEASURES = [
         "side_effects": "Requires diplomatic policy input",
         "scenario": "nusantara"
     }
-]
+])
 
-SCENARIOS = [
+SCENARIOS = _freeze([
     {
         "id": "scenario_1",
         "name": "SELAT MELAKA GUARDIAN",
@@ -962,20 +1053,57 @@ SCENARIOS = [
             "intelligence_gathered": "14 new radar signatures, 3 new comm protocols"
         }
     }
-]
+])
+
+# Sample data augmented with IDs once at import - served as-is while the DB is empty
+SAMPLE_EMITTERS_WITH_IDS = _freeze([dict(e, id=uuid7()) for e in SAMPLE_EMITTERS])
+SAMPLE_COUNTERMEASURES_WITH_IDS = _freeze([dict(c, id=uuid7()) for c in SAMPLE_COUNTERMEASURES])
+
+SCENARIOS_BY_ID = {s["id"]: s for s in SCENARIOS}
+
+# Name lookups for scenario emitter resolution (raw entries, IDs are assigned on insert)
+SAMPLE_EMITTERS_BY_NAME = {e["name"]: e for e in SAMPLE_EMITTERS}
+_SAMPLE_EMITTERS_WITH_IDS_BY_NAME = {e["name"]: e for e in SAMPLE_EMITTERS_WITH_IDS}
+
+# Scenario emitter names resolved once - raw entries for activation, ID'd entries for GET /scenarios/{id}
+SCENARIO_SAMPLE_EMITTERS = {
+    s["id"]: tuple(SAMPLE_EMITTERS_BY_NAME[name] for name in s.get("emitters", []) if name in SAMPLE_EMITTERS_BY_NAME)
+    for s in SCENARIOS
+}
+SCENARIO_EMITTER_DATA = {
+    s["id"]: tuple(_SAMPLE_EMITTERS_WITH_IDS_BY_NAME[name] for name in s.get("emitters", []) if name in _SAMPLE_EMITTERS_WITH_IDS_BY_NAME)
+    for s in SCENARIOS
+}
+
+def fold_emitter_stats(groups) -> Tuple[int, int, int, List[str]]:
+    """Fold (affiliation, emitter_type, count) groups into (total, hostile, friendly, threat_types)"""
+    total = hostile = friendly = 0
+    threat_types = set()
+    for affiliation, emitter_type, n in groups:
+        total += n
+        if affiliation == "hostile":
+            hostile += n
+        elif affiliation == "friendly":
+            friendly += n
+        threat_types.add(emitter_type)
+    return total, hostile, friendly, sorted(threat_types)
+
+# Stats for the sample set, used by /metrics and /ai/chat while the DB is empty
+SAMPLE_EMITTER_STATS = fold_emitter_stats(
+    (e["affiliation"], e.get("emitter_type", "unknown"), 1) for e in SAMPLE_EMITTERS
+)
+
+# ID/name lookups for AI analysis of sample emitters
+_SAMPLE_EMITTERS_WITH_IDS_BY_ID = {e["id"]: e for e in SAMPLE_EMITTERS_WITH_IDS}
 
 # ============ AI INTEGRATION ============
 
-async def get_ai_response(query: str, context: Dict[str, Any] = None) -> str:
-    """Get AI response using Gemini 2.5 Flash via emergentintegrations"""
-    try:
-        from emergentintegrations.llm.chat import LlmChat, UserMessage
-        
-        api_key = os.environ.get('EMERGENT_LLM_KEY')
-        if not api_key:
-            return "AI system offline - API key not configured"
-        
-        system_message = """You are EW HALIMUNAN ATM AI Assistant - Himpunan Analisis Lindungan Intelijen Medan Udara Negara.
+try:
+    from emergentintegrations.llm.chat import LlmChat, UserMessage
+except ImportError:  # AI endpoints report offline without the SDK
+    LlmChat = UserMessage = None
+
+AI_SYSTEM_MESSAGE = """You are EW HALIMUNAN ATM AI Assistant - Himpunan Analisis Lindungan Intelijen Medan Udara Negara.
 You serve the Malaysian Armed Forces (Angkatan Tentera Malaysia - ATM) as an Electronic Warfare decision support system.
 
 SYSTEM TAGLINE: "Halimun menjadi perisai senyap angkasa memayungi negara"
@@ -1005,106 +1133,374 @@ RESPONSE FORMAT:
 - Support Malaysia's strategic neutrality - proportional, non-kinetic responses
 - Format for quick comprehension in tactical environment"""
 
-        chat = LlmChat(
-            api_key=api_key,
-            session_id=f"halimun-{uuid.uuid4()}",
-            system_message=system_message
-        ).with_model("gemini", "gemini-2.5-flash")
+def _new_chat(api_key: str, session_id: str):
+    return LlmChat(
+        api_key=api_key,
+        session_id=f"halimun-{session_id}",
+        system_message=AI_SYSTEM_MESSAGE
+    ).with_model("gemini", "gemini-2.5-flash")
+
+class ChatSession:
+    """One client's LlmChat; turns are serialized and the history is bounded"""
+    MAX_TURNS = 20  # the chat is restarted once this many turns have accumulated
+    
+    def __init__(self, api_key: str, session_id: str):
+        self.api_key = api_key
+        self.session_id = session_id
+        self.lock = asyncio.Lock()
+        self.generation = 0
+        self._restart()
+    
+    def _restart(self):
+        self.generation += 1
+        self.chat = _new_chat(self.api_key, f"{self.session_id}-{self.generation}")
+        self.turns = 0
+    
+    async def send(self, text: str) -> str:
+        async with self.lock:
+            if self.turns >= self.MAX_TURNS:
+                self._restart()
+            self.turns += 1
+            return await self.chat.send_message(UserMessage(text=text))
+
+# Chat sessions keyed by server-issued id, least recently used evicted first
+_CHAT_SESSIONS_MAX = 256
+_chat_sessions: "OrderedDict[str, ChatSession]" = OrderedDict()
+
+def has_chat_session(session_id: Optional[str]) -> bool:
+    return session_id is not None and session_id in _chat_sessions
+
+def _get_chat_session(api_key: str, session_id: str) -> ChatSession:
+    session = _chat_sessions.get(session_id)
+    if session is not None:
+        _chat_sessions.move_to_end(session_id)
+        return session
+    
+    session = _chat_sessions[session_id] = ChatSession(api_key, session_id)
+    if len(_chat_sessions) > _CHAT_SESSIONS_MAX:
+        _chat_sessions.popitem(last=False)
+    return session
+
+# Replies to session-less prompts (the /ai/analyze routes; /ai/chat always runs in a
+# session), keyed by the full prompt text with its context
+_AI_RESPONSE_CACHE_MAX = 1024
+_AI_RESPONSE_TTL_S = 60
+_ai_responses: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+
+async def get_ai_response(query: str, context: Dict[str, Any] = None, session_id: Optional[str] = None) -> str:
+    """Get AI response using Gemini 2.5 Flash via emergentintegrations.
+    
+    Calls sharing a session_id continue one ChatSession; without one a fresh chat
+    is used and identical prompts within a minute are answered from cache.
+    """
+    try:
+        if LlmChat is None:
+            return "AI system offline - emergentintegrations not installed"
+        
+        api_key = os.environ.get('EMERGENT_LLM_KEY')
+        if not api_key:
+            return "AI system offline - API key not configured"
         
         # Add context to query if available
         enhanced_query = query
         if context:
             enhanced_query = f"Context: {context}\n\nQuery: {query}"
         
-        user_message = UserMessage(text=enhanced_query)
-        response = await chat.send_message(user_message)
+        if session_id:
+            return await _get_chat_session(api_key, session_id).send(enhanced_query)
+        
+        # A session's history makes its replies stateful, so only one-off prompts are cached
+        cached = _ai_responses.get(enhanced_query)
+        if cached is not None and time.monotonic() < cached[0]:
+            _ai_responses.move_to_end(enhanced_query)
+            return cached[1]
+        
+        chat = _new_chat(api_key, uuid.uuid4().hex)
+        response = await chat.send_message(UserMessage(text=enhanced_query))
+        
+        _ai_responses[enhanced_query] = (time.monotonic() + _AI_RESPONSE_TTL_S, response)
+        _ai_responses.move_to_end(enhanced_query)
+        if len(_ai_responses) > _AI_RESPONSE_CACHE_MAX:
+            _ai_responses.popitem(last=False)
         return response
         
     except Exception as e:
         logging.error(f"AI Error: {str(e)}")
         return f"AI analysis unavailable: {str(e)}"
 
+# ============ GEOSPATIAL ============
+
+EARTH_RADIUS_M = 6371000.0
+
+class EmitterColumns:
+    """Coordinates of a fixed emitter sequence held as read-only NumPy columns"""
+    def __init__(self, emitters):
+        self.emitters = tuple(emitters)
+        n = len(self.emitters)
+        self.lat = np.fromiter((e["latitude"] for e in self.emitters), dtype=np.float64, count=n)
+        self.lng = np.fromiter((e["longitude"] for e in self.emitters), dtype=np.float64, count=n)
+        # Radians and cos(latitude) precomputed so a query only pays the trig for its own point
+        self.lat_rad = np.radians(self.lat)
+        self.lng_rad = np.radians(self.lng)
+        self.cos_lat = np.cos(self.lat_rad)
+        for column in (self.lat, self.lng, self.lat_rad, self.lng_rad, self.cos_lat):
+            column.flags.writeable = False
+    
+    def distances_from(self, lat: float, lng: float, radius: float = EARTH_RADIUS_M) -> np.ndarray:
+        """Great-circle distance in metres from (lat, lng) to every emitter"""
+        lat0, lng0 = math.radians(lat), math.radians(lng)
+        a = (np.sin((self.lat_rad - lat0) / 2) ** 2
+             + math.cos(lat0) * self.cos_lat * np.sin((self.lng_rad - lng0) / 2) ** 2)
+        return 2 * radius * np.arcsin(np.sqrt(a))
+    
+    def within(self, lat: float, lng: float, radius_m: float) -> List:
+        """Emitters within radius_m of (lat, lng), nearest first - one vectorized distance pass"""
+        distances = self.distances_from(lat, lng)
+        inside = np.flatnonzero(distances <= radius_m)
+        return [self.emitters[i] for i in inside[np.argsort(distances[inside], kind="stable")]]
+
+# Sample emitter positions, columnised once for the proximity fallback
+SAMPLE_EMITTER_COLUMNS = EmitterColumns(SAMPLE_EMITTERS_WITH_IDS)
+
 # ============ SIMULATION ENGINE ============
 
+# Threat scoring tables
+THREAT_LEVEL_SCORES = {"critical": 0.95, "high": 0.75, "medium": 0.5, "low": 0.25}
+AFFILIATION_MULTIPLIERS = {"hostile": 1.2, "friendly": 0.1}
+
+KILL_CHAIN_PHASES = ("detection", "tracking", "engagement", "intercept")
+ACTIONS_HIGH = ("Activate ECM", "Deploy decoys", "Maneuver to minimize exposure")
+ACTIONS_MEDIUM = ("Continue monitoring", "Prepare countermeasures")
+ACTIONS_LOW = ("Track for intelligence", "Log to database")
+
+@lru_cache(maxsize=64)
+def _assess_structural(threat_level: str, affiliation: str) -> Tuple[float, float, Tuple[str, ...]]:
+    """Deterministic part of a threat assessment: (base_score, threat_score, recommended_actions)"""
+    # Adjust based on type and affiliation
+    base_score = THREAT_LEVEL_SCORES.get(threat_level, 0.5) * AFFILIATION_MULTIPLIERS.get(affiliation, 1.0)
+    
+    if base_score > 0.7:
+        actions = ACTIONS_HIGH
+    elif base_score > 0.4:
+        actions = ACTIONS_MEDIUM
+    else:
+        actions = ACTIONS_LOW
+    return base_score, min(1.0, base_score), actions
+
+# Shared simulation RNG (PCG64)
+_RNG = np.random.default_rng()
+
 class BattlefieldSimulator:
     def __init__(self):
-        self.active_emitters = []
         self.time_offset = 0
+        self.rng = _RNG
+        self.set_active_emitters([])
     
-    def generate_signal_update(self, emitter: Dict) -> Dict:
-        """Generate realistic signal parameter variations"""
-        variation = random.uniform(-0.02, 0.02)
-        return {
-            "emitter_id": emitter.get("id", str(uuid.uuid4())),
-            "name": emitter["name"],
-            "latitude": emitter["latitude"] + random.uniform(-0.01, 0.01),
-            "longitude": emitter["longitude"] + random.uniform(-0.01, 0.01),
-            "signal_strength": -50 + random.uniform(-10, 10),  # dBm
-            "frequency": (emitter["frequency_min"] + emitter["frequency_max"]) / 2 + random.uniform(-5, 5),
-            "confidence": min(1.0, emitter.get("confidence", 0.85) + variation),
-            "timestamp": datetime.now(timezone.utc).isoformat(),
-            "affiliation": emitter["affiliation"],
-            "threat_level": emitter["threat_level"]
-        }
+    def set_active_emitters(self, emitters: List[Dict]):
+        """Cache the static per-emitter fields as arrays and pre-build the update dicts"""
+        self.active_emitters = list(emitters)
+        self._lat = np.array([e["latitude"] for e in self.active_emitters], dtype=np.float64)
+        self._lon = np.array([e["longitude"] for e in self.active_emitters], dtype=np.float64)
+        self._center_freq = np.array(
+            [(e["frequency_min"] + e["frequency_max"]) / 2 for e in self.active_emitters], dtype=np.float64
+        )
+        self._confidence = np.array([e.get("confidence", 0.85) for e in self.active_emitters], dtype=np.float64)
+        self.current_updates = [
+            {
+                "emitter_id": e.get("id") or uuid7(),
+                "name": e["name"],
+                "latitude": 0.0,
+                "longitude": 0.0,
+                "signal_strength": 0.0,
+                "frequency": 0.0,
+                "confidence": 0.0,
+                "timestamp": "",
+                "affiliation": e["affiliation"],
+                "threat_level": e["threat_level"]
+            }
+            for e in self.active_emitters
+        ]
+        self.tick()
     
-    def assess_threat(self, emitter: Dict) -> Dict:
-        """Generate threat assessment for an emitter"""
-        threat_scores = {"critical": 0.95, "high": 0.75, "medium": 0.5, "low": 0.25}
-        base_score = threat_scores.get(emitter["threat_level"], 0.5)
-        
-        # Adjust based on type and affiliation
-        if emitter["affiliation"] == "hostile":
-            base_score *= 1.2
-        elif emitter["affiliation"] == "friendly":
-            base_score *= 0.1
-        
-        kill_chain_phases = ["detection", "tracking", "engagement", "intercept"]
-        phase = random.choice(kill_chain_phases[:2]) if emitter["affiliation"] == "hostile" else "monitoring"
-        
-        actions = []
-        if base_score > 0.7:
-            actions = ["Activate ECM", "Deploy decoys", "Maneuver to minimize exposure"]
-        elif base_score > 0.4:
-            actions = ["Continue monitoring", "Prepare countermeasures"]
-        else:
-            actions = ["Track for intelligence", "Log to database"]
+    def tick(self):
+        """Advance current_updates in place with one vectorized RNG draw"""
+        noise = self.rng.uniform(-1.0, 1.0, size=(5, len(self.active_emitters)))
+        latitudes = (self._lat + noise[0] * 0.01).tolist()
+        longitudes = (self._lon + noise[1] * 0.01).tolist()
+        strengths = (-50 + noise[2] * 10).tolist()  # dBm
+        frequencies = (self._center_freq + noise[3] * 5).tolist()
+        confidences = np.minimum(1.0, self._confidence + noise[4] * 0.02).tolist()
+        timestamp = utc_now_iso()
+        for i, update in enumerate(self.current_updates):
+            update["latitude"] = latitudes[i]
+            update["longitude"] = longitudes[i]
+            update["signal_strength"] = strengths[i]
+            update["frequency"] = frequencies[i]
+            update["confidence"] = confidences[i]
+            update["timestamp"] = timestamp
+    
+    def assess_threats_batch(self, emitters: List[Dict]) -> List[Dict]:
+        """Generate threat assessments for a batch of emitters with one RNG draw per batch"""
+        n = len(emitters)
+        phase_picks = self.rng.integers(0, 2, size=n).tolist()
+        impact_times = self.rng.uniform(30, 300, size=n).tolist()
         
-        return {
-            "emitter_id": emitter.get("id", "unknown"),
-            "emitter_name": emitter["name"],
-            "threat_score": min(1.0, base_score),
-            "kill_chain_phase": phase,
-            "time_to_impact": random.uniform(30, 300) if base_score > 0.7 else None,
-            "recommended_actions": actions,
-            "assessed_at": datetime.now(timezone.utc).isoformat()
-        }
+        timestamp = utc_now_iso()
+        assessments = []
+        for i, emitter in enumerate(emitters):
+            base_score, threat_score, actions = _assess_structural(emitter["threat_level"], emitter["affiliation"])
+            is_hostile = emitter["affiliation"] == "hostile"
+            assessments.append({
+                "emitter_id": emitter.get("id", "unknown"),
+                "emitter_name": emitter["name"],
+                "threat_score": threat_score,
+                "kill_chain_phase": KILL_CHAIN_PHASES[phase_picks[i]] if is_hostile else "monitoring",
+                "time_to_impact": impact_times[i] if base_score > 0.7 else None,
+                "recommended_actions": actions,
+                "assessed_at": timestamp
+            })
+        return assessments
 
 simulator = BattlefieldSimulator()
+simulator.set_active_emitters(SAMPLE_EMITTERS_WITH_IDS[:5])
+
+SIMULATION_TICK_S = 2
+
+def build_battlefield_frame(version: int) -> str:
+    """Serialize the current simulator state once for every WebSocket client"""
+    return orjson.dumps({
+        "type": "battlefield_update",
+        "version": version,
+        "data": simulator.current_updates,
+        "timestamp": utc_now_iso()
+    }).decode()
+
+# Each new frame bumps the version and sets the current event; waiters are woken
+# once and the event is replaced for the next tick
+battlefield_version = 0
+battlefield_frame = build_battlefield_frame(battlefield_version)
+battlefield_changed = asyncio.Event()
+
+def publish_battlefield_frame():
+    global battlefield_version, battlefield_frame, battlefield_changed
+    battlefield_version += 1
+    battlefield_frame = build_battlefield_frame(battlefield_version)
+    battlefield_changed.set()
+    battlefield_changed = asyncio.Event()
+
+async def run_simulation():
+    """Advance the shared battlefield state once per tick for all WebSocket clients"""
+    while True:
+        # Nobody is watching - skip the tick and the encode; a new client still gets the last frame on connect
+        if manager.active_connections:
+            simulator.tick()
+            publish_battlefield_frame()
+        await asyncio.sleep(SIMULATION_TICK_S)
 
 # ============ WEBSOCKET CONNECTION MANAGER ============
 
 class ConnectionManager:
+    SEND_TIMEOUT_S = 5.0  # a client that cannot take a frame within this is dropped
+    
     def __init__(self):
-        self.active_connections: List[WebSocket] = []
+        self.active_connections: Set[WebSocket] = set()
     
     async def connect(self, websocket: WebSocket):
         await websocket.accept()
-        self.active_connections.append(websocket)
+        self.active_connections.add(websocket)
     
     def disconnect(self, websocket: WebSocket):
-        self.active_connections.remove(websocket)
+        # May already have been pruned by a failed send
+        self.active_connections.discard(websocket)
     
-    async def broadcast(self, message: dict):
-        for connection in self.active_connections:
-            try:
-                await connection.send_json(message)
-            except:
-                pass
+    async def send(self, websocket: WebSocket, payload: str) -> bool:
+        """Send one text frame; a failed or stalled send disconnects the client"""
+        try:
+            await asyncio.wait_for(websocket.send_text(payload), timeout=self.SEND_TIMEOUT_S)
+            return True
+        except Exception:
+            self.disconnect(websocket)
+            return False
 
 manager = ConnectionManager()
 
 # ============ API ROUTES ============
 
+class CachedPayload:
+    """Pre-serialized JSON body with its ETag, for read-mostly endpoints"""
+    def __init__(self, data: Any, max_age: int):
+        self.body = orjson.dumps(data)
+        self.etag = f'"{hashlib.md5(self.body).hexdigest()}"'
+        self.max_age = max_age
+    
+    def respond(self, request: Request) -> Response:
+        headers = {"ETag": self.etag, "Cache-Control": f"max-age={self.max_age}"}
+        if request.headers.get("if-none-match") == self.etag:
+            return Response(status_code=304, headers=headers)
+        return Response(self.body, media_type="application/json", headers=headers)
+
+class TTLCache:
+    """Value rebuilt by an async factory at most once per ttl_s; concurrent misses share one rebuild"""
+    def __init__(self, build: Callable[[], Awaitable[Any]], ttl_s: float):
+        self.build = build
+        self.ttl_s = ttl_s
+        self.value = None
+        self.expires = 0.0
+        self.lock = asyncio.Lock()
+    
+    async def get(self) -> Any:
+        async with self.lock:
+            if self.value is None or time.monotonic() >= self.expires:
+                self.value = await self.build()
+                self.expires = time.monotonic() + self.ttl_s
+        return self.value
+    
+    def invalidate(self):
+        self.expires = 0.0
+
+class TTLPayloadCache(TTLCache):
+    """TTLCache holding a CachedPayload whose max-age matches the TTL"""
+    def __init__(self, build: Callable[[], Awaitable[Any]], ttl_s: int):
+        async def build_payload() -> CachedPayload:
+            return CachedPayload(await build(), max_age=ttl_s)
+        super().__init__(build_payload, ttl_s)
+    
+    async def respond(self, request: Request) -> Response:
+        return (await self.get()).respond(request)
+
+SCENARIOS_PAYLOAD = CachedPayload([dict(s) for s in SCENARIOS], max_age=60)
+
+# Sample emitter listing served while the DB is empty, encoded once
+SAMPLE_EMITTERS_JSON = orjson.dumps([dict(e) for e in SAMPLE_EMITTERS_WITH_IDS])
+
+async def load_emitter_stats() -> Tuple[int, int, int, List[str]]:
+    if not app.state.db_seeded_emitters:
+        return SAMPLE_EMITTER_STATS
+    # Sorting on the (affiliation, emitter_type) index lets the group run as a covered index scan
+    groups = await db.emitters.aggregate([
+        {"$sort": {"affiliation": 1, "emitter_type": 1}},
+        {"$group": {"_id": {"affiliation": "$affiliation", "type": "$emitter_type"}, "n": {"$sum": 1}}}
+    ]).to_list(None)
+    return fold_emitter_stats(
+        (g["_id"].get("affiliation"), g["_id"].get("type", "unknown"), g["n"]) for g in groups
+    )
+
+EMITTER_STATS_TTL_S = 2
+_emitter_stats_cache = TTLCache(load_emitter_stats, EMITTER_STATS_TTL_S)
+
+async def get_emitter_stats() -> Tuple[int, int, int, List[str]]:
+    """(total, hostile, friendly, threat_types) for the emitter collection, cached briefly"""
+    return await _emitter_stats_cache.get()
+
+async def sync_emitters_seeded():
+    # Sample data stands in for the emitters collection exactly while it is empty
+    app.state.db_seeded_emitters = await db.emitters.count_documents({}, limit=1) > 0
+
+def invalidate_emitter_caches():
+    # Emitter writes make the stats and every snapshot derived from the collection stale
+    for cache in (_emitter_stats_cache, _metrics_cache, _threats_cache):
+        cache.invalidate()
+
 @api_router.get("/")
 async def root():
     return {"message": "AEGIS MIND - Electronic Warfare Decision Support System", "status": "operational"}
@@ -1115,29 +1511,58 @@ async def health_check():
         "status": "healthy",
         "system": "EW HALIMUNAN ATM",
         "version": "1.0.0",
-        "timestamp": datetime.now(timezone.utc).isoformat()
+        "timestamp": utc_now_iso()
     }
 
 # Emitter Routes
 @api_router.get("/emitters", response_model=List[Dict])
-async def get_emitters(affiliation: Optional[str] = None, threat_level: Optional[str] = None):
+async def get_emitters(
+    affiliation: Optional[str] = None,
+    threat_level: Optional[str] = None,
+    limit: int = Query(1000, ge=1, le=1000),
+    skip: int = Query(0, ge=0)
+):
+    if not app.state.db_seeded_emitters:
+        # Return sample data if DB is empty - the full listing is pre-encoded, pages are sliced
+        if skip == 0 and limit >= len(SAMPLE_EMITTERS_WITH_IDS):
+            return Response(SAMPLE_EMITTERS_JSON, media_type="application/json")
+        return [dict(e) for e in SAMPLE_EMITTERS_WITH_IDS[skip:skip + limit]]
+    
     query = {}
     if affiliation:
         query["affiliation"] = affiliation
     if threat_level:
         query["threat_level"] = threat_level
     
-    emitters = await db.emitters.find(query, {"_id": 0}).to_list(1000)
-    if not emitters:
-        # Return sample data if DB is empty
-        return [dict(e, id=str(uuid.uuid4())) for e in SAMPLE_EMITTERS]
-    return emitters
+    # _id order is insertion order and uses the default _id index for stable paging
+    cursor = db.emitters.find(query, {"_id": 0}).sort("_id", 1).skip(skip).limit(limit)
+    return [doc async for doc in cursor]
+
+@api_router.get("/emitters/near", response_model=List[Dict])
+async def get_emitters_near(
+    lat: float = Query(..., ge=-90, le=90),
+    lng: float = Query(..., ge=-180, le=180),
+    radius_m: float = Query(50000, gt=0)
+):
+    """Get emitters within radius_m metres of a point, nearest first"""
+    if app.state.db_seeded_emitters:
+        # Served by the 2dsphere index on location; $nearSphere already sorts by distance
+        return await db.emitters.find(
+            {"location": {"$nearSphere": {
+                "$geometry": {"type": "Point", "coordinates": [lng, lat]},
+                "$maxDistance": radius_m
+            }}},
+            {"_id": 0}
+        ).to_list(1000)
+    return SAMPLE_EMITTER_COLUMNS.within(lat, lng, radius_m)
 
 @api_router.post("/emitters", response_model=Dict)
 async def create_emitter(emitter: EmitterCreate):
-    emitter_obj = Emitter(**emitter.model_dump())
-    doc = emitter_obj.model_dump()
-    await db.emitters.insert_one(doc)
+    doc = Emitter.model_validate(emitter.model_dump()).model_dump()
+    # insert_one adds an ObjectId _id to the dict it is given - keep it out of the response
+    await db.emitters.insert_one(dict(doc))
+    app.state.db_seeded_emitters = True
+    invalidate_emitter_caches()
     return doc
 
 @api_router.get("/emitters/{emitter_id}", response_model=Dict)
@@ -1152,228 +1577,312 @@ async def delete_emitter(emitter_id: str):
     result = await db.emitters.delete_one({"id": emitter_id})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Emitter not found")
+    await sync_emitters_seeded()
+    invalidate_emitter_caches()
     return {"message": "Emitter deleted"}
 
 # Countermeasure Routes
 @api_router.get("/countermeasures", response_model=List[Dict])
-async def get_countermeasures():
+async def get_countermeasures(request: Request):
+    return await _countermeasures_cache.respond(request)
+
+async def load_countermeasures() -> List[Dict]:
     countermeasures = await db.countermeasures.find({}, {"_id": 0}).to_list(100)
-    if not countermeasures:
-        return [dict(c, id=str(uuid.uuid4())) for c in SAMPLE_COUNTERMEASURES]
-    return countermeasures
+    return countermeasures or [dict(c) for c in SAMPLE_COUNTERMEASURES_WITH_IDS]
+
+COUNTERMEASURES_TTL_S = 30
+_countermeasures_cache = TTLPayloadCache(load_countermeasures, COUNTERMEASURES_TTL_S)
+
+def build_countermeasure_index(countermeasures) -> Dict[str, List[Dict]]:
+    """Map lowercased threat type -> countermeasures, best success rate first"""
+    index = defaultdict(list)
+    for cm in countermeasures:
+        for threat in {t.lower() for t in cm.get("applicable_threats", [])}:
+            index[threat].append(cm)
+    for bucket in index.values():
+        bucket.sort(key=lambda x: x.get("success_rate", 0), reverse=True)
+    return dict(index)
+
+COUNTERMEASURES_BY_THREAT = build_countermeasure_index(SAMPLE_COUNTERMEASURES_WITH_IDS)
+
+async def refresh_countermeasure_index():
+    """Rebuild the recommendation index from the DB - call after countermeasures change"""
+    global COUNTERMEASURES_BY_THREAT
+    all_cms = await db.countermeasures.find({}, {"_id": 0}).to_list(100)
+    COUNTERMEASURES_BY_THREAT = build_countermeasure_index(all_cms or SAMPLE_COUNTERMEASURES_WITH_IDS)
 
 @api_router.get("/countermeasures/recommend/{threat_type}")
 async def recommend_countermeasures(threat_type: str):
     """Get recommended countermeasures for a specific threat type"""
-    all_cms = await db.countermeasures.find({}, {"_id": 0}).to_list(100)
-    if not all_cms:
-        all_cms = [dict(c, id=str(uuid.uuid4())) for c in SAMPLE_COUNTERMEASURES]
-    
-    recommendations = [cm for cm in all_cms if threat_type.lower() in [t.lower() for t in cm.get("applicable_threats", [])]]
     return {
         "threat_type": threat_type,
-        "recommendations": sorted(recommendations, key=lambda x: x.get("success_rate", 0), reverse=True),
-        "timestamp": datetime.now(timezone.utc).isoformat()
+        "recommendations": COUNTERMEASURES_BY_THREAT.get(threat_type.lower(), []),
+        "timestamp": utc_now_iso()
     }
 
 # Scenario Routes
 @api_router.get("/scenarios", response_model=List[Dict])
-async def get_scenarios():
-    return SCENARIOS
+async def get_scenarios(request: Request):
+    return SCENARIOS_PAYLOAD.respond(request)
 
 @api_router.get("/scenarios/{scenario_id}")
 async def get_scenario(scenario_id: str):
-    scenario = next((s for s in SCENARIOS if s["id"] == scenario_id), None)
+    scenario = SCENARIOS_BY_ID.get(scenario_id)
     if not scenario:
         raise HTTPException(status_code=404, detail="Scenario not found")
     
-    # Get emitters for this scenario
-    emitters = []
-    for emitter_name in scenario.get("emitters", []):
-        emitter = next((e for e in SAMPLE_EMITTERS if e["name"] == emitter_name), None)
-        if emitter:
-            emitters.append(dict(emitter, id=str(uuid.uuid4())))
-    
     return {
         **scenario,
-        "emitter_data": emitters,
-        "loaded_at": datetime.now(timezone.utc).isoformat()
+        "emitter_data": list(SCENARIO_EMITTER_DATA[scenario_id]),
+        "loaded_at": utc_now_iso()
     }
 
+# Scenario rosters validated through Emitter once at import; activation only stamps
+# fresh ids and timestamps onto copies
+SCENARIO_EMITTER_DOCS = {
+    scenario_id: tuple(EMITTER_LIST_ADAPTER.dump_python(EMITTER_LIST_ADAPTER.validate_python(
+        [dict(e, source="simulation") for e in roster]
+    )))
+    for scenario_id, roster in SCENARIO_SAMPLE_EMITTERS.items()
+}
+
 @api_router.post("/scenarios/{scenario_id}/activate")
 async def activate_scenario(scenario_id: str):
     """Activate a scenario and populate emitters"""
-    scenario = next((s for s in SCENARIOS if s["id"] == scenario_id), None)
+    scenario = SCENARIOS_BY_ID.get(scenario_id)
     if not scenario:
         raise HTTPException(status_code=404, detail="Scenario not found")
     
-    # Clear existing simulation emitters and add scenario emitters
-    await db.emitters.delete_many({"source": "simulation"})
+    # One timestamp for the whole roster instead of two datetime.now() calls per emitter
+    now = datetime.now(timezone.utc).isoformat()
+    docs = [
+        dict(doc, id=uuid7(), created_at=now, last_detected=now)
+        for doc in SCENARIO_EMITTER_DOCS[scenario_id]
+    ]
     
-    emitters_added = []
-    for emitter_name in scenario.get("emitters", []):
-        emitter_data = next((e for e in SAMPLE_EMITTERS if e["name"] == emitter_name), None)
-        if emitter_data:
-            emitter_obj = Emitter(**emitter_data, source="simulation")
-            doc = emitter_obj.model_dump()
-            await db.emitters.insert_one(doc)
-            emitters_added.append(doc)
+    # Clear existing simulation emitters and add scenario emitters in one ordered round trip
+    await db.emitters.bulk_write(
+        [DeleteMany({"source": "simulation"})] + [InsertOne(doc) for doc in docs], ordered=True
+    )
+    await sync_emitters_seeded()
+    invalidate_emitter_caches()
     
     return {
         "scenario_id": scenario_id,
         "status": "activated",
-        "emitters_loaded": len(emitters_added),
-        "timestamp": datetime.now(timezone.utc).isoformat()
+        "emitters_loaded": len(docs),
+        "timestamp": utc_now_iso()
     }
 
 # Threat Assessment Routes
+SAMPLE_HOSTILE_EMITTERS = tuple(e for e in SAMPLE_EMITTERS_WITH_IDS if e["affiliation"] == "hostile")
+
 @api_router.get("/threats/assess")
-async def assess_all_threats():
+async def assess_all_threats(request: Request):
     """Generate threat assessment for all active emitters"""
-    emitters = await db.emitters.find({"affiliation": "hostile"}, {"_id": 0}).to_list(100)
-    if not emitters:
-        emitters = [e for e in SAMPLE_EMITTERS if e["affiliation"] == "hostile"]
+    # Dashboards poll this; one assessment is shared by every request in a 2 s window
+    return await _threats_cache.respond(request)
+
+async def build_threat_assessment() -> Dict[str, Any]:
+    if app.state.db_seeded_emitters:
+        emitters = await db.emitters.aggregate([
+            {"$match": {"affiliation": "hostile"}},
+            {"$project": {"_id": 0, "id": 1, "name": 1, "threat_level": 1, "affiliation": 1}},
+            {"$limit": 100},
+        ]).to_list(100)
+    else:
+        emitters = SAMPLE_HOSTILE_EMITTERS
     
-    assessments = [simulator.assess_threat(e) for e in emitters]
+    assessments = simulator.assess_threats_batch(emitters)
     return {
         "total_threats": len(assessments),
         "critical_count": sum(1 for a in assessments if a["threat_score"] > 0.8),
         "assessments": sorted(assessments, key=lambda x: x["threat_score"], reverse=True),
-        "timestamp": datetime.now(timezone.utc).isoformat()
+        "timestamp": utc_now_iso()
     }
 
-@api_router.get("/threats/timeline")
-async def get_threat_timeline():
-    """Get threat timeline data for visualization"""
-    # Generate simulated timeline data
-    timeline = []
-    base_time = datetime.now(timezone.utc)
-    
-    events = [
+THREATS_TTL_S = 2
+_threats_cache = TTLPayloadCache(build_threat_assessment, THREATS_TTL_S)
+
+# Static simulated timeline events - only the timestamp changes per request
+TIMELINE_EVENTS = _freeze([
+    {"id": uuid.uuid4().hex, "event": event, "phase": phase, "severity": severity, "offset_minutes": -i * 5}
+    for i, (event, phase, severity) in enumerate([
         ("Radar contact detected - Type 346B", "detection", "critical"),
         ("Tracking initiated on CSG", "tracking", "high"),
         ("New emitter - YLC-8B active", "detection", "high"),
         ("Missile seeker active - DF-21D", "engagement", "critical"),
         ("ECM deployed - AN/SLQ-32", "countermeasure", "info"),
         ("Threat neutralized - decoy success", "resolution", "success"),
-    ]
-    
-    for i, (event, phase, severity) in enumerate(events):
-        timeline.append({
-            "id": str(uuid.uuid4()),
-            "timestamp": (base_time.replace(second=0, microsecond=0)).isoformat(),
-            "event": event,
-            "phase": phase,
-            "severity": severity,
-            "offset_minutes": -i * 5
-        })
-    
-    return {"timeline": timeline}
+    ])
+])
+
+@api_router.get("/threats/timeline")
+async def get_threat_timeline():
+    """Get threat timeline data for visualization"""
+    timestamp = datetime.now(timezone.utc).replace(second=0, microsecond=0).isoformat()
+    return {"timeline": [dict(event, timestamp=timestamp) for event in TIMELINE_EVENTS]}
 
 # AI Chat Routes
 @api_router.post("/ai/chat", response_model=ChatResponse)
 async def ai_chat(message: ChatMessage):
     """Send a message to the AI assistant"""
     # Get current threat context
-    emitters = await db.emitters.find({}, {"_id": 0}).to_list(50)
-    if not emitters:
-        emitters = SAMPLE_EMITTERS[:5]
+    active_count, hostile_count, _, threat_types = await get_emitter_stats()
     
     context = {
-        "active_emitters": len(emitters),
-        "hostile_count": sum(1 for e in emitters if e.get("affiliation") == "hostile"),
-        "threat_types": list(set(e.get("emitter_type", "unknown") for e in emitters)),
+        "active_emitters": active_count,
+        "hostile_count": hostile_count,
+        "threat_types": threat_types,
         "current_scenario": "Active monitoring"
     }
     
-    response = await get_ai_response(message.message, context)
+    # Only ids this server issued continue a conversation; anything else starts a new one
+    session_id = message.session_id if has_chat_session(message.session_id) else uuid7()
+    response = await get_ai_response(message.message, context, session_id=session_id)
     
     return ChatResponse(
         response=response,
-        context=context
+        context=context,
+        session_id=session_id
     )
 
+ANALYZE_EMITTER_PROMPT = """Analyze this electronic warfare emitter and provide tactical assessment for Malaysian Armed Forces:
+    Name: {name}
+    Type: {emitter_type}
+    Origin: {origin}
+    Frequency: {frequency_min}-{frequency_max} MHz
+    Platform: {platform}
+    Threat Level: {threat_level}
+    Affiliation: {affiliation}
+    Description: {description}
+    
+    Provide in Malay/English mix: 1) Threat assessment 2) Likely mission 3) Recommended countermeasures 4) Kill chain position"""
+
+def find_sample_emitter(emitter_id: str):
+    """Sample emitter by generated ID, or by (URL-encoded) name"""
+    return _SAMPLE_EMITTERS_WITH_IDS_BY_ID.get(emitter_id) or SAMPLE_EMITTERS_BY_NAME.get(unquote(emitter_id))
+
+class _PromptFields(dict):
+    """Emitter fields for format_map; missing keys render as the prompt always has"""
+    def __missing__(self, key):
+        return "N/A" if key == "description" else None
+
 @api_router.get("/ai/analyze/{emitter_id}")
 async def ai_analyze_emitter(emitter_id: str):
     """Get AI analysis of a specific emitter"""
     emitter = await db.emitters.find_one({"id": emitter_id}, {"_id": 0})
     if not emitter:
-        # Try to find in sample data by ID
-        emitter = next((e for e in SAMPLE_EMITTERS if e.get("id") == emitter_id), None)
-    if not emitter:
-        # Try to find by name (URL decoded)
-        from urllib.parse import unquote
-        decoded_id = unquote(emitter_id)
-        emitter = next((e for e in SAMPLE_EMITTERS if e.get("name") == decoded_id), None)
+        emitter = find_sample_emitter(emitter_id)
     
     if not emitter:
         raise HTTPException(status_code=404, detail="Emitter not found")
     
-    query = f"""Analyze this electronic warfare emitter and provide tactical assessment for Malaysian Armed Forces:
-    Name: {emitter.get('name')}
-    Type: {emitter.get('emitter_type')}
-    Origin: {emitter.get('origin')}
-    Frequency: {emitter.get('frequency_min')}-{emitter.get('frequency_max')} MHz
-    Platform: {emitter.get('platform')}
-    Threat Level: {emitter.get('threat_level')}
-    Affiliation: {emitter.get('affiliation')}
-    Description: {emitter.get('description', 'N/A')}
-    
-    Provide in Malay/English mix: 1) Threat assessment 2) Likely mission 3) Recommended countermeasures 4) Kill chain position"""
-    
+    query = ANALYZE_EMITTER_PROMPT.format_map(_PromptFields(emitter))
     analysis = await get_ai_response(query)
     
     return {
         "emitter_id": emitter_id,
         "emitter_name": emitter.get("name"),
         "analysis": analysis,
-        "timestamp": datetime.now(timezone.utc).isoformat()
+        "timestamp": utc_now_iso()
+    }
+
+@api_router.post("/ai/analyze/batch")
+async def ai_analyze_emitters(request: AnalyzeBatchRequest):
+    """Get AI analysis of several emitters in one request"""
+    emitter_ids = list(dict.fromkeys(request.emitter_ids))
+    found = {
+        e["id"]: e
+        for e in await db.emitters.find({"id": {"$in": emitter_ids}}, {"_id": 0}).to_list(len(emitter_ids))
+    }
+    emitters = {}
+    not_found = []
+    for emitter_id in emitter_ids:
+        emitter = found.get(emitter_id) or find_sample_emitter(emitter_id)
+        if emitter:
+            emitters[emitter_id] = emitter
+        else:
+            not_found.append(emitter_id)
+    
+    # The provider has no batch API - the prompts go out concurrently instead of one after another
+    analyses = await asyncio.gather(*(
+        get_ai_response(ANALYZE_EMITTER_PROMPT.format_map(_PromptFields(e))) for e in emitters.values()
+    ))
+    
+    return {
+        "analyses": [
+            {"emitter_id": emitter_id, "emitter_name": e.get("name"), "analysis": analysis}
+            for (emitter_id, e), analysis in zip(emitters.items(), analyses)
+        ],
+        "not_found": not_found,
+        "timestamp": utc_now_iso()
     }
 
 # System Metrics
 @api_router.get("/metrics")
-async def get_system_metrics():
+async def get_system_metrics(request: Request):
     """Get current system performance metrics"""
-    emitters = await db.emitters.find({}, {"_id": 0}).to_list(1000)
-    if not emitters:
-        emitters = SAMPLE_EMITTERS
+    # The snapshot is rebuilt at most once per second; pollers in between get the same body
+    return await _metrics_cache.respond(request)
+
+async def build_metrics_snapshot() -> Dict[str, Any]:
+    total, hostile_count, friendly_count, _ = await get_emitter_stats()
     
-    hostile = [e for e in emitters if e.get("affiliation") == "hostile"]
-    friendly = [e for e in emitters if e.get("affiliation") == "friendly"]
+    # Simulated performance figures, drawn in one call (inclusive upper bounds)
+    latency_ms, assessment_ms, ai_ms, uptime_hours, signals_24h = _RNG.integers(
+        [15, 50, 200, 100, 50000], [45, 95, 800, 500, 150000], endpoint=True
+    ).tolist()
     
     return {
-        "emitters_tracked": len(emitters),
-        "hostile_count": len(hostile),
-        "friendly_count": len(friendly),
+        "emitters_tracked": total,
+        "hostile_count": hostile_count,
+        "friendly_count": friendly_count,
         "classification_accuracy": 0.947,
-        "processing_latency_ms": random.randint(15, 45),
-        "threat_assessment_ms": random.randint(50, 95),
-        "ai_response_ms": random.randint(200, 800),
-        "uptime_hours": random.randint(100, 500),
-        "signals_processed_24h": random.randint(50000, 150000),
-        "timestamp": datetime.now(timezone.utc).isoformat()
+        "processing_latency_ms": latency_ms,
+        "threat_assessment_ms": assessment_ms,
+        "ai_response_ms": ai_ms,
+        "uptime_hours": uptime_hours,
+        "signals_processed_24h": signals_24h,
+        "timestamp": utc_now_iso()
     }
 
+METRICS_TTL_S = 1
+_metrics_cache = TTLPayloadCache(build_metrics_snapshot, METRICS_TTL_S)
+
 # WebSocket for real-time updates
 @app.websocket("/ws/battlefield")
 async def websocket_battlefield(websocket: WebSocket):
     await manager.connect(websocket)
+    if len(manager.active_connections) == 1:
+        # Ticks are skipped while nobody is watching - refresh the frame for the first client back
+        simulator.tick()
+        publish_battlefield_frame()
     try:
+        # Current frame on connect, then only when the simulation publishes a new one
+        sent_version = None
         while True:
-            # Send periodic updates
-            emitters = SAMPLE_EMITTERS[:5]
-            updates = [simulator.generate_signal_update(e) for e in emitters]
-            
-            await websocket.send_json({
-                "type": "battlefield_update",
-                "data": updates,
-                "timestamp": datetime.now(timezone.utc).isoformat()
-            })
-            
-            await asyncio.sleep(2)  # Update every 2 seconds
-    except WebSocketDisconnect:
+            if sent_version == battlefield_version:
+                await battlefield_changed.wait()
+            sent_version = battlefield_version
+            if not await manager.send(websocket, battlefield_frame):
+                break
+    finally:
         manager.disconnect(websocket)
 
+# CORS ahead of the routes; browsers may cache preflight responses for a day
+CORS_ORIGINS = [origin.strip() for origin in os.environ.get('CORS_ORIGINS', '*').split(',')]
+app.add_middleware(
+    CORSMiddleware,
+    allow_credentials=True,
+    allow_origins=CORS_ORIGINS,
+    allow_methods=["*"],
+    allow_headers=["*"],
+    max_age=86400,
+)
+# Listing payloads are repetitive JSON; anything over 1 KB goes out gzipped to clients that accept it
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=5)
+
 # Include the router in the main app
 app.include_router(api_router)
 
@@ -1385,17 +1894,9 @@ async def root_health_check():
         "status": "healthy",
         "system": "EW HALIMUNAN ATM",
         "version": "1.0.0",
-        "timestamp": datetime.now(timezone.utc).isoformat()
+        "timestamp": utc_now_iso()
     }
 
-app.add_middleware(
-    CORSMiddleware,
-    allow_credentials=True,
-    allow_origins=os.environ.get('CORS_ORIGINS', '*').split(','),
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -1408,17 +1909,42 @@ async def startup_event():
     """Initialize database with sample data if empty"""
     logger.info("EW HALIMUNAN ATM - Memulakan Sistem...")
     
+    # Establish the connection pool before serving traffic
+    await db.command("ping")
+    
+    # Indexes backing the emitter filters (idempotent)
+    await db.emitters.create_index("id", unique=True)
+    await db.emitters.create_index([("affiliation", 1), ("threat_level", 1)])
+    await db.emitters.create_index([("affiliation", 1), ("emitter_type", 1)])
+    await db.emitters.create_index("source")
+    # Documents stored before location was persisted would be invisible to $nearSphere.
+    # Out-of-range coordinates are skipped: the 2dsphere build below would reject them
+    await db.emitters.update_many(
+        {
+            "location": {"$exists": False},
+            "latitude": {"$type": "number", "$gte": -90, "$lte": 90},
+            "longitude": {"$type": "number", "$gte": -180, "$lte": 180},
+        },
+        [{"$set": {"location": {"type": "Point", "coordinates": ["$longitude", "$latitude"]}}}]
+    )
+    await db.emitters.create_index([("location", "2dsphere")])
+    await sync_emitters_seeded()
+    
     # Initialize countermeasures if empty
     count = await db.countermeasures.count_documents({})
     if count == 0:
-        for cm in SAMPLE_COUNTERMEASURES:
-            cm_obj = dict(cm, id=str(uuid.uuid4()))
-            await db.countermeasures.insert_one(cm_obj)
+        await db.countermeasures.insert_many(
+            [dict(cm, id=uuid7()) for cm in SAMPLE_COUNTERMEASURES], ordered=False
+        )
         logger.info("Pangkalan data countermeasures diinisialisasi")
+    await refresh_countermeasure_index()
+    
+    app.state.simulation_task = asyncio.create_task(run_simulation())
     
     logger.info("EW HALIMUNAN ATM - Sistem Aktif")
 
 @app.on_event("shutdown")
 async def shutdown_db_client():
+    app.state.simulation_task.cancel()
     client.close()
     logger.info("EW HALIMUNAN ATM - Sistem Ditutup")
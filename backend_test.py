@@ -6,6 +6,7 @@ Tests all backend endpoints for the Electronic Warfare Decision Support System
 
 import requests
 import json
+import math
 import sys
 from datetime import datetime
 from typing import Dict, List, Any
@@ -16,6 +17,7 @@ class AegisMindTester:
         self.tests_run = 0
         self.tests_passed = 0
         self.test_results = []
+        self.last_response = None
 
     def log_test(self, name: str, success: bool, details: str = "", response_data: Any = None):
         """Log test result"""
@@ -56,6 +58,7 @@ class AegisMindTester:
             else:
                 raise ValueError(f"Unsupported method: {method}")
 
+            self.last_response = response
             success = response.status_code == expected_status
             
             try:
@@ -228,6 +231,22 @@ class AegisMindTester:
         
         return success
 
+    def test_ai_chat_sessions(self):
+        """Test that separate chat callers never share a session"""
+        ids = []
+        for caller in ("A", "B"):
+            success, response = self.run_test(f"AI Chat - Caller {caller}", "POST", "ai/chat", 200, 
+                                              {"message": "Status?", "session_id": "aegis-console"})
+            if not success or not isinstance(response, dict):
+                return False
+            ids.append(response.get("session_id"))
+        
+        if ids[0] and ids[1] and ids[0] != ids[1] and "aegis-console" not in ids:
+            self.log_test("AI Chat - Session Isolation", True, "Each caller got its own session")
+            return True
+        self.log_test("AI Chat - Session Isolation", False, f"Session ids: {ids}")
+        return False
+
     def test_ai_analysis_endpoint(self):
         """Test AI analysis endpoint for specific emitters"""
         # Test with URL encoded emitter name
@@ -312,6 +331,142 @@ class AegisMindTester:
         
         return success
 
+    def test_emitters_paging(self):
+        """Test that paging past the end of the emitter listing returns an empty page"""
+        success, response = self.run_test("Emitters - Skip Past End", "GET", "emitters?skip=100000")
+        if success:
+            if response == []:
+                self.log_test("Emitters Paging - Empty Page", True, "Empty list past the last emitter")
+            else:
+                count = len(response) if isinstance(response, list) else "non-list"
+                self.log_test("Emitters Paging - Empty Page", False, f"Expected [], got {count} items")
+                success = False
+        
+        return success
+
+    def test_emitter_counts_agree(self):
+        """Test that the emitter listing and metrics fall back to sample data together"""
+        success, emitters = self.run_test("Get Emitters - Count Check", "GET", "emitters")
+        if not success or not isinstance(emitters, list):
+            return False
+        success, metrics = self.run_test("Get Metrics - Count Check", "GET", "metrics")
+        if not success or not isinstance(metrics, dict):
+            return False
+        
+        tracked = metrics.get("emitters_tracked")
+        if len(emitters) < 1000 and tracked != len(emitters):
+            self.log_test("Emitter Counts - Agree", False, 
+                        f"Listing has {len(emitters)} emitters, metrics report {tracked}")
+            return False
+        self.log_test("Emitter Counts - Agree", True, f"{tracked} emitters tracked")
+        return True
+
+    def test_emitters_near(self):
+        """Test proximity search returns emitters nearest first"""
+        success, emitters = self.run_test("Get Emitters - Near Origin", "GET", "emitters")
+        if not success or not isinstance(emitters, list) or not emitters:
+            self.log_test("Emitters Near - Setup", False, "No emitters to search around")
+            return False
+        
+        lat, lng = emitters[0]["latitude"], emitters[0]["longitude"]
+        success, response = self.run_test("Emitters Near", "GET", f"emitters/near?lat={lat}&lng={lng}&radius_m=500000")
+        if success and isinstance(response, list) and response:
+            distances = [self._distance_m(lat, lng, e["latitude"], e["longitude"]) for e in response]
+            if all(a <= b + 1 for a, b in zip(distances, distances[1:])):
+                self.log_test("Emitters Near - Ordering", True, 
+                            f"{len(response)} emitters, nearest {distances[0]:.0f} m")
+            else:
+                self.log_test("Emitters Near - Ordering", False, "Results are not sorted nearest first")
+                success = False
+        elif success:
+            self.log_test("Emitters Near - Data Format", False, "Expected a non-empty list")
+            success = False
+        
+        return success
+
+    @staticmethod
+    def _distance_m(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+        """Great-circle distance in metres"""
+        p1, p2 = math.radians(lat1), math.radians(lat2)
+        a = (math.sin((p2 - p1) / 2) ** 2
+             + math.cos(p1) * math.cos(p2) * math.sin(math.radians(lng2 - lng1) / 2) ** 2)
+        return 2 * 6371000 * math.asin(math.sqrt(a))
+
+    def test_activated_emitters_near(self):
+        """Test that emitters stored by scenario activation are found by proximity search"""
+        success, emitters = self.run_test("Get Emitters - Activated", "GET", "emitters?limit=1")
+        if not success or not isinstance(emitters, list) or not emitters:
+            self.log_test("Activated Emitters Near - Setup", False, "No emitters after activation")
+            return False
+        
+        emitter = emitters[0]
+        success, response = self.run_test("Emitters Near - Activated", "GET", 
+                                          f"emitters/near?lat={emitter['latitude']}&lng={emitter['longitude']}&radius_m=1000")
+        if success:
+            found = isinstance(response, list) and any(e.get("id") == emitter["id"] for e in response)
+            self.log_test("Activated Emitters Near - Location Stored", found, 
+                        f"{emitter['name']} {'found' if found else 'missing'} at its own position")
+            success = found
+        
+        return success
+
+    def test_create_emitter_out_of_range(self):
+        """Test that coordinates outside the globe are rejected rather than stored"""
+        emitter = {
+            "name": "Out Of Range Test", "emitter_type": "radar", "platform": "ship", "origin": "Test",
+            "threat_level": "low", "frequency_min": 1.0, "frequency_max": 2.0,
+            "latitude": 95.0, "longitude": 101.0
+        }
+        return self.run_test("Create Emitter - Latitude 95", "POST", "emitters", 422, emitter)[0]
+
+    def test_ai_analysis_batch(self):
+        """Test batch AI analysis reports unknown emitter IDs separately"""
+        success, emitters = self.run_test("Get Emitters - Batch Analysis", "GET", "emitters?limit=2")
+        if not success or not isinstance(emitters, list) or not emitters:
+            self.log_test("AI Batch Analysis - Setup", False, "No emitters to analyze")
+            return False
+        
+        known_ids = [e["id"] for e in emitters if "id" in e]
+        payload = {"emitter_ids": known_ids + ["unknown-emitter-id"]}
+        success, response = self.run_test("AI Batch Analysis", "POST", "ai/analyze/batch", 200, payload)
+        if success and isinstance(response, dict):
+            analyzed = [a.get("emitter_id") for a in response.get("analyses", [])]
+            not_found = response.get("not_found", [])
+            if not_found == ["unknown-emitter-id"] and analyzed == known_ids:
+                self.log_test("AI Batch Analysis - Results", True, 
+                            f"Analyzed {len(analyzed)}, not found: {not_found}")
+            else:
+                self.log_test("AI Batch Analysis - Results", False, 
+                            f"Analyzed: {analyzed}, not found: {not_found}")
+                success = False
+        elif success:
+            self.log_test("AI Batch Analysis - Data Format", False, "Response is not a dict")
+        
+        return success
+
+    def check_not_modified(self, name: str, endpoint: str) -> bool:
+        """Repeat a GET with the ETag it returned and expect 304 Not Modified"""
+        success, _ = self.run_test(f"{name} - ETag", "GET", endpoint)
+        etag = self.last_response.headers.get("ETag") if success else None
+        if not etag:
+            self.log_test(f"{name} - ETag Header", False, f"No ETag on {endpoint} response")
+            return False
+        
+        return self.run_test(f"{name} - Not Modified", "GET", endpoint, 304, 
+                             headers={"If-None-Match": etag})[0]
+
+    def test_cached_payloads_not_modified(self):
+        """Test that /scenarios and /countermeasures answer revalidation with 304"""
+        scenarios = self.check_not_modified("Scenarios", "scenarios")
+        countermeasures = self.check_not_modified("Countermeasures", "countermeasures")
+        return scenarios and countermeasures
+
+    def test_snapshots_not_modified(self):
+        """Test that the cached threat and metrics snapshots answer revalidation with 304"""
+        threats = self.check_not_modified("Threat Assessment", "threats/assess")
+        metrics = self.check_not_modified("Metrics", "metrics")
+        return threats and metrics
+
     def run_all_tests(self):
         """Run all backend tests"""
         print("🚀 Starting AEGIS MIND Backend API Tests")
@@ -325,14 +480,23 @@ class AegisMindTester:
         self.test_threats_assessment()
         self.test_countermeasures_endpoint()
         self.test_metrics_endpoint()
+        self.test_emitters_paging()
+        self.test_emitter_counts_agree()
+        self.test_emitters_near()
+        self.test_create_emitter_out_of_range()
+        self.test_cached_payloads_not_modified()
+        self.test_snapshots_not_modified()
         
         # Specific scenario tests
         self.test_specific_scenarios()
         
         # AI and advanced features
         self.test_ai_chat_endpoint()
+        self.test_ai_chat_sessions()
         self.test_ai_analysis_endpoint()
+        self.test_ai_analysis_batch()
         self.test_scenario_activation()
+        self.test_activated_emitters_near()
 
         # Print summary
         print("=" * 60)
@@ -18,6 +18,7 @@ const AIConsole = ({ selectedEmitter }) => {
   ]);
   const [input, setInput] = useState("");
   const [isLoading, setIsLoading] = useState(false);
+  const [sessionId, setSessionId] = useState(null);
   const scrollRef = useRef(null);
   const inputRef = useRef(null);
 
@@ -65,8 +66,9 @@ const AIConsole = ({ selectedEmitter }) => {
     try {
       const response = await axios.post(`${API}/ai/chat`, {
         message: input,
-        session_id: "aegis-console"
+        session_id: sessionId
       });
+      setSessionId(response.data.session_id);
 
       const aiMessage = {
         role: "assistant",